@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 import uuid
 
@@ -48,4 +48,16 @@ class WeatherReadingCreate(BaseModel):
     wind_direction: int
     wind_direction_text: str
     humidity: Optional[int] = None
-    visibility: Optional[float] = None
\ No newline at end of file
+    visibility: Optional[float] = None
+
+class NowcastPoint(BaseModel):
+    time: datetime
+    temperature: float
+    pressure: float
+    windSpeed: float
+
+class NowcastResponse(BaseModel):
+    location: str
+    basedOn: int
+    lastReading: datetime
+    points: List[NowcastPoint]
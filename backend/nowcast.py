@@ -0,0 +1,249 @@
+import sys
+import math
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from models import WeatherReading, NowcastPoint, NowcastResponse
+
+logger = logging.getLogger(__name__)
+
+# Tahmin edilen alanlar (weather_readings kolon adları)
+NOWCAST_FIELDS = ("temperature", "pressure", "wind_speed")
+
+# Bu eşiğin altına düşen geçmiş ağırlıkları sonuca katkı yapmaz
+_NEGLIGIBLE_WEIGHT = 1e-12
+
+# Tek okuma varken kullanılan varsayılan okuma aralığı (saniye)
+_DEFAULT_INTERVAL = 3600.0
+
+
+class _LocationState:
+    """Bir lokasyon için Holt durumunu (seviye + trend) tutar"""
+    __slots__ = ("location", "state", "interval", "last_timestamp", "count")
+
+    def __init__(self, location: str, state: np.ndarray, interval: Optional[float], last_timestamp: datetime, count: int):
+        # Mongo'da saklanan özgün lokasyon adı (ör. "Sivas")
+        self.location = location
+        # state[0] = seviye, state[1] = trend; her kolon bir alan
+        self.state = state
+        self.interval = interval
+        self.last_timestamp = last_timestamp
+        self.count = count
+
+
+class NowcastEngine:
+    """Sönümlü Holt (seviye + trend) üstel düzeltme ile kısa vadeli tahmin motoru.
+
+    Güncelleme denklemleri sabit katsayılı doğrusal bir sistemdir:
+    s_t = A s_{t-1} + g x_t. Her yeni okuma O(1) ile işlenir, başlangıçta
+    ise durum A'nın kuvvetleri üzerinden tek bir vektörel geçişle yeniden
+    kurulur. A^k ihmal edilebilir hale geldiği için yalnızca son
+    `history_depth` okuma gerekir.
+    """
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.05, phi: float = 0.98, interval_alpha: float = 0.1):
+        self.alpha = alpha
+        self.beta = beta
+        self.phi = phi
+        self.interval_alpha = interval_alpha
+
+        self._transition = np.array([
+            [1 - alpha, (1 - alpha) * phi],
+            [-alpha * beta, phi * (1 - alpha * beta)],
+        ])
+        self._gain = np.array([alpha, alpha * beta])
+        self._states: Dict[str, _LocationState] = {}
+        self._catch_up_lock = asyncio.Lock()
+
+        # Sistemin bozunma hızı: A'nın spektral yarıçapı. Bunun ötesindeki
+        # geçmiş, durum üzerinde _NEGLIGIBLE_WEIGHT'ten küçük iz bırakır.
+        self._radius = float(np.max(np.abs(np.linalg.eigvals(self._transition))))
+        # Yeniden kurulum için gereken en fazla okuma sayısı (lokasyon başına)
+        self.history_depth = max(
+            self._effective_window(self._radius, sys.maxsize),
+            self._effective_window(1.0 - interval_alpha, sys.maxsize),
+        ) + 2
+
+    @staticmethod
+    def _key(location: str) -> str:
+        return location.strip().lower()
+
+    def locations(self) -> List[str]:
+        return list(self._states)
+
+    def update(self, reading: WeatherReading) -> None:
+        """Yeni bir okumayı O(1) ile duruma ekler; daha eski okumalar yok sayılır"""
+        self._update_values(reading.location, reading.timestamp, [getattr(reading, field) for field in NOWCAST_FIELDS])
+
+    def _update_values(self, location: str, timestamp: datetime, fields: List[float]) -> None:
+        key = self._key(location)
+        values = np.array(fields, dtype=float)
+        current = self._states.get(key)
+
+        if current is None:
+            state = np.vstack([values, np.zeros_like(values)])
+            self._states[key] = _LocationState(location, state, None, timestamp, 1)
+            return
+
+        if timestamp <= current.last_timestamp:
+            # Zaten işlenmiş (ör. write-through sonrası catch-up)
+            return
+
+        dt = (timestamp - current.last_timestamp).total_seconds()
+        if current.interval is None:
+            current.interval = dt
+        else:
+            current.interval = self.interval_alpha * dt + (1 - self.interval_alpha) * current.interval
+
+        current.state = self._transition @ current.state + np.outer(self._gain, values)
+        current.last_timestamp = timestamp
+        current.count += 1
+
+    def _effective_window(self, decay: float, n: int) -> int:
+        """Ağırlıkları ihmal edilebilir hale gelmeden önceki adım sayısı"""
+        if n == 0 or decay <= 0.0:
+            return min(n, 1)
+        if decay >= 1.0:
+            return n
+        return min(n, int(math.ceil(math.log(_NEGLIGIBLE_WEIGHT) / math.log(decay))) + 1)
+
+    def _matrix_powers(self, n: int) -> np.ndarray:
+        """A^0 ... A^n matrislerini ikiye katlama yöntemiyle hesaplar"""
+        powers = np.empty((n + 1, 2, 2))
+        powers[0] = np.eye(2)
+        step = self._transition.copy()  # her zaman A^filled
+        filled = 1
+        while filled <= n:
+            take = min(filled, n + 1 - filled)
+            powers[filled:filled + take] = powers[:take] @ step
+            filled += take
+            step = step @ step
+        return powers
+
+    def rebuild_location(self, location: str, timestamps: np.ndarray, values: np.ndarray, count: Optional[int] = None) -> None:
+        """Bir lokasyonun durumunu geçmişten tek vektörel geçişle kurar.
+
+        `timestamps` artan sıralı datetime64 dizisi, `values` ise
+        (okuma sayısı, len(NOWCAST_FIELDS)) boyutlu bir matristir. Sonuç
+        için son `history_depth` okuma yeterlidir; `count` verilirse
+        toplam okuma sayısı olarak kullanılır.
+        """
+        total = len(timestamps)
+        if total == 0:
+            return
+        values = np.asarray(values, dtype=float)
+        n = total - 1
+
+        window = self._effective_window(self._radius, n)
+        start = n - window
+
+        state = np.vstack([values[start], np.zeros(values.shape[1])])
+        if window > 0:
+            powers = self._matrix_powers(window)
+            weights = powers[window - 1::-1] @ self._gain  # (window, 2)
+            state = powers[window] @ state + weights.T @ values[start + 1:]
+
+        interval = None
+        if n > 0:
+            deltas = np.diff(timestamps).astype("timedelta64[us]").astype(float) / 1e6
+            deltas = np.maximum(deltas, 0.0)
+            keep = 1.0 - self.interval_alpha
+            span = self._effective_window(keep, n)
+            exponents = np.arange(span - 1, -1, -1)
+            weights = self.interval_alpha * keep ** exponents
+            if span == n:
+                # İlk aralık EWMA'nın başlangıç değeridir
+                weights[0] = keep ** (n - 1)
+            interval = float(weights @ deltas[n - span:])
+
+        last_timestamp = timestamps[-1].astype("datetime64[us]").astype(datetime)
+        self._states[self._key(location)] = _LocationState(location, state, interval, last_timestamp, count or total)
+
+    def rebuild(self, readings: List[Dict[str, Any]], counts: Optional[Dict[str, int]] = None) -> None:
+        """Zamana göre artan sıralı ham kayıtlardan lokasyonları yeniden kurar"""
+        if not readings:
+            return
+        counts = counts or {}
+        locations = np.array([self._key(r["location"]) for r in readings])
+        timestamps = np.array([r["timestamp"] for r in readings], dtype="datetime64[us]")
+        values = np.array([[r[field] for field in NOWCAST_FIELDS] for r in readings], dtype=float)
+
+        for key in np.unique(locations):
+            mask = locations == key
+            # Yalnızca son history_depth okuma sonucu etkiler
+            tail = np.flatnonzero(mask)[-self.history_depth:]
+            location = readings[tail[-1]]["location"]
+            self.rebuild_location(location, timestamps[tail], values[tail], counts.get(str(key), int(mask.sum())))
+
+    async def _load_location(self, db, location: str) -> int:
+        """Tek lokasyonun son history_depth okumasını Mongo'dan yükler"""
+        projection = {"_id": 0, "location": 1, "timestamp": 1}
+        projection.update({field: 1 for field in NOWCAST_FIELDS})
+        readings = await db.weather_readings.find({"location": location}, projection).sort("timestamp", -1).limit(self.history_depth).to_list(self.history_depth)
+        readings.reverse()
+        total = await db.weather_readings.count_documents({"location": location})
+        self.rebuild(readings, {self._key(location): total})
+        return len(readings)
+
+    async def load_from_db(self, db) -> None:
+        """weather_readings koleksiyonundan başlangıç durumunu kurar"""
+        loaded = 0
+        for location in await db.weather_readings.distinct("location"):
+            loaded += await self._load_location(db, location)
+        logger.info(f"Nowcast state rebuilt from {loaded} readings for {len(self._states)} locations")
+
+    async def catch_up(self, db) -> None:
+        """Başka worker'ların Mongo'ya eklediği yeni okumaları duruma işler.
+
+        Tek sorgu, lokasyonlar arasındaki en eski son okumadan başlar;
+        lokasyonun zaten işlenmiş okumaları update() içinde atlanır.
+        """
+        async with self._catch_up_lock:
+            if not self._states:
+                await self.load_from_db(db)
+                return
+            watermark = min(current.last_timestamp for current in self._states.values())
+            projection = {"_id": 0, "location": 1, "timestamp": 1}
+            projection.update({field: 1 for field in NOWCAST_FIELDS})
+            query = {"timestamp": {"$gt": watermark}}
+            readings = await db.weather_readings.find(query, projection).sort("timestamp", 1).to_list(None)
+            for reading in readings:
+                self._update_values(reading["location"], reading["timestamp"], [reading[field] for field in NOWCAST_FIELDS])
+
+    def forecast(self, location: str, hours: int = 3) -> Optional[NowcastResponse]:
+        """Bellekteki durumdan saatlik tahmin üretir; lokasyon bilinmiyorsa None"""
+        current = self._states.get(self._key(location))
+        if current is None:
+            return None
+
+        interval = current.interval or _DEFAULT_INTERVAL
+        steps_per_hour = 3600.0 / interval
+        level, trend = current.state
+
+        points = []
+        for hour in range(1, hours + 1):
+            steps = hour * steps_per_hour
+            # Sönümlü trend: phi + phi^2 + ... + phi^h
+            if self.phi == 1.0:
+                damping = steps
+            else:
+                damping = self.phi * (1 - self.phi ** steps) / (1 - self.phi)
+            predicted = level + damping * trend
+            values = dict(zip(NOWCAST_FIELDS, predicted))
+            points.append(NowcastPoint(
+                time=current.last_timestamp + timedelta(hours=hour),
+                temperature=round(float(values["temperature"]), 1),
+                pressure=round(float(values["pressure"]), 1),
+                windSpeed=round(max(float(values["wind_speed"]), 0.0), 1),
+            ))
+
+        return NowcastResponse(
+            location=current.location,
+            basedOn=current.count,
+            lastReading=current.last_timestamp,
+            points=points,
+        )
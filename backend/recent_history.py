@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from models import WeatherReading
+
+logger = logging.getLogger(__name__)
+
+# Sayısal kolonlar; boş (None) değerler NaN olarak tutulur
+_FLOAT_FIELDS = ("temperature", "wind_speed", "precipitation", "pressure", "humidity", "visibility")
+_OPTIONAL_FIELDS = ("humidity", "visibility")
+
+_readings_adapter = TypeAdapter(List[WeatherReading])
+
+
+class _ReadingRing:
+    """Tek lokasyonun son N okumasını kolon dizilerinde tutan halka tampon"""
+
+    def __init__(self, location: str, capacity: int):
+        self.location = location
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0  # bir sonraki yazılacak indeks
+
+        # Mongo milisaniye hassasiyetinde sakladığı için aynı çözünürlük kullanılır
+        self.timestamps = np.empty(capacity, dtype="datetime64[ms]")
+        self.floats = {field: np.empty(capacity) for field in _FLOAT_FIELDS}
+        self.wind_direction = np.empty(capacity, dtype=np.int16)
+        self.ids: List[Optional[str]] = [None] * capacity
+        self.wind_direction_text: List[Optional[str]] = [None] * capacity
+        self.sources: List[Optional[str]] = [None] * capacity
+        self._id_set: Set[str] = set()
+
+    def newest(self) -> Optional[np.datetime64]:
+        if self.size == 0:
+            return None
+        return self.timestamps[(self.head - 1) % self.capacity]
+
+    def append(self, reading: Dict[str, Any]) -> bool:
+        if reading["id"] in self._id_set:
+            # Zaten tamponda (ör. write-through sonrası catch-up)
+            return False
+        timestamp = np.datetime64(reading["timestamp"], "ms")
+        newest = self.newest()
+        if newest is not None and timestamp < newest:
+            # Halka zaman sırasını korur; sıra dışı eski okumalar yalnızca Mongo'dadır
+            return False
+
+        i = self.head
+        if self.size == self.capacity:
+            self._id_set.discard(self.ids[i])
+        self.timestamps[i] = timestamp
+        for field in _FLOAT_FIELDS:
+            value = reading.get(field)
+            self.floats[field][i] = np.nan if value is None else value
+        self.wind_direction[i] = reading["wind_direction"]
+        self.ids[i] = reading["id"]
+        self._id_set.add(reading["id"])
+        self.wind_direction_text[i] = reading["wind_direction_text"]
+        self.sources[i] = reading.get("source", "openweathermap")
+
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def latest_indices(self, limit: int) -> np.ndarray:
+        """En yeniden eskiye doğru indeksler"""
+        count = min(limit, self.size)
+        return (self.head - 1 - np.arange(count)) % self.capacity
+
+    def row(self, i: int) -> WeatherReading:
+        values = {field: float(self.floats[field][i]) for field in _FLOAT_FIELDS}
+        for field in _OPTIONAL_FIELDS:
+            if np.isnan(values[field]):
+                values[field] = None
+        if values["humidity"] is not None:
+            values["humidity"] = int(values["humidity"])
+        return WeatherReading(
+            id=self.ids[i],
+            location=self.location,
+            wind_direction=int(self.wind_direction[i]),
+            wind_direction_text=self.wind_direction_text[i],
+            timestamp=self.timestamps[i].astype(datetime),
+            source=self.sources[i],
+            **values,
+        )
+
+
+class RecentHistory:
+    """Lokasyon başına son okumaları bellekte tutar ve JSON'u eklemeler arasında saklar.
+
+    Tampon her eklemede güncellenir (write-through) ve başlangıçta Mongo'dan
+    doldurulur. Kapasiteden büyük sorgular için None döner; çağıran taraf
+    Mongo'ya geri düşer.
+    """
+
+    def __init__(self, capacity: int = 240):
+        self.capacity = capacity
+        self.ready = False
+        self._rings: Dict[str, _ReadingRing] = {}
+        self._serialized: Dict[Tuple[Optional[str], int], bytes] = {}
+        self._catch_up_lock = asyncio.Lock()
+
+    def add(self, reading: Dict[str, Any]) -> None:
+        """Yeni okumayı tampona yazar ve JSON cache'ini geçersiz kılar"""
+        location = reading["location"]
+        ring = self._rings.get(location)
+        if ring is None:
+            ring = self._rings[location] = _ReadingRing(location, self.capacity)
+        if ring.append(reading):
+            self._serialized.clear()
+
+    async def _load_location(self, db, location: str) -> int:
+        """Lokasyonun son `capacity` okumasını Mongo'dan tampona ekler"""
+        readings = await db.weather_readings.find({"location": location}).sort("timestamp", -1).limit(self.capacity).to_list(self.capacity)
+        for reading in reversed(readings):
+            self.add(reading)
+        return len(readings)
+
+    async def _load_all(self, db) -> int:
+        locations = await db.weather_readings.distinct("location")
+        total = 0
+        for location in locations:
+            total += await self._load_location(db, location)
+        return total
+
+    async def warm(self, db) -> None:
+        """Her lokasyonun son `capacity` okumasını Mongo'dan yükler"""
+        self._rings.clear()
+        self._serialized.clear()
+        total = await self._load_all(db)
+        self.ready = True
+        logger.info(f"History buffer warmed with {total} readings for {len(self._rings)} locations")
+
+    async def catch_up(self, db) -> None:
+        """Başka worker'ların Mongo'ya eklediği yeni okumaları tampona alır.
+
+        Tek sorgu, lokasyonlar arasındaki en eski son okumadan başlar; aynı
+        milisaniyedeki okumalar da gelsin diye $gte kullanılır ve tekrarlar
+        id ile elenir.
+        """
+        async with self._catch_up_lock:
+            newest = [ring.newest() for ring in self._rings.values() if ring.size]
+            if not newest:
+                await self._load_all(db)
+                return
+            query = {"timestamp": {"$gte": min(newest).astype(datetime)}}
+            readings = await db.weather_readings.find(query).sort("timestamp", 1).to_list(None)
+            for reading in readings:
+                self.add(reading)
+
+    def covers(self, limit: int) -> bool:
+        """Tampon bu limiti karşılayabiliyor mu (değilse sorgu Mongo'ya gider)"""
+        return self.ready and 0 < limit <= self.capacity
+
+    def serialized(self, limit: int, location: Optional[str] = None) -> Optional[bytes]:
+        """Son `limit` okumanın JSON'unu döndürür; tampon yetmiyorsa None"""
+        if not self.covers(limit):
+            return None
+
+        if location is not None and location not in self._rings:
+            # Bilinmeyen lokasyonlar cache'lenmez; sorgu parametresi serbest metindir
+            return b"[]"
+
+        cache_key = (location, limit)
+        payload = self._serialized.get(cache_key)
+        if payload is not None:
+            return payload
+
+        rings = [self._rings[location]] if location is not None else list(self._rings.values())
+
+        # Her halkadan en fazla `limit` kayıt yeterli; zamana göre birleştirilir
+        candidates = [
+            (ring.timestamps[i], ring, int(i))
+            for ring in rings
+            for i in ring.latest_indices(limit)
+        ]
+        if len(rings) > 1:
+            candidates.sort(key=lambda item: item[0], reverse=True)
+        readings = [ring.row(i) for _, ring, i in candidates[:limit]]
+
+        payload = _readings_adapter.dump_json(readings)
+        self._serialized[cache_key] = payload
+        return payload
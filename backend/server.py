@@ -1,14 +1,17 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime
-from models import WeatherReading, WeatherReadingCreate, WeatherResponse
+from models import WeatherReading, WeatherReadingCreate, WeatherResponse, NowcastResponse
 from weather_service import WeatherService
+from nowcast import NowcastEngine
+from shared_cache import SharedCache, create_cache_backend
+from recent_history import RecentHistory
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,44 +30,128 @@ api_router = APIRouter(prefix="/api")
 # Weather service instance
 weather_service = WeatherService()
 
+# Kısa vadeli tahmin motoru (bellekte tutulur)
+nowcast_engine = NowcastEngine()
+
+class SharedJSONResponse(Response):
+    """Paylaşımlı cache'teki JSON'u (mmap memoryview dahil) kopyalamadan gönderir"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, memoryview):
+            return content
+        return super().render(content)
+
+# Worker'lar arası paylaşımlı cache (varsayılan: /dev/shm altında dosya)
+shared_cache = SharedCache(create_cache_backend())
+WEATHER_CACHE_KEY = "weather:sivas"
+WEATHER_CACHE_TTL = float(os.environ.get('WEATHER_CACHE_TTL', '600'))
+
+# Son okumalar için bellek içi tampon (küçük history sorguları Mongo'ya gitmez)
+recent_history = RecentHistory(int(os.environ.get('HISTORY_BUFFER_SIZE', '240')))
+
+async def refresh_sivas_weather() -> bytes:
+    """Upstream'den güncel veriyi çeker, kaydeder ve JSON olarak döndürür"""
+    weather_data = await weather_service.get_sivas_weather()
+    
+    # Veritabanına kaydet
+    weather_reading = WeatherReadingCreate(
+        location="Sivas",
+        temperature=weather_data.temperature.value,
+        wind_speed=weather_data.windSpeed.value,
+        precipitation=weather_data.precipitation.value,
+        pressure=weather_data.pressure.value,
+        wind_direction=weather_data.windDirection.degrees,
+        wind_direction_text=weather_data.windDirection.value
+    )
+    
+    # Kendi okumamızdan önce diğer worker'ların okumaları alınır; aksi halde
+    # daha eski zamanlı okumalar tampona ve tahmin durumuna giremez
+    for target in ("history", "nowcast"):
+        try:
+            await sync_worker_state(target)
+        except Exception as e:
+            logger.warning(f"Worker state sync error before refresh: {str(e)}")
+    
+    reading_dict = weather_reading.dict()
+    weather_obj = WeatherReading(**reading_dict)
+    reading_doc = weather_obj.dict()
+    await db.weather_readings.insert_one(reading_doc)
+    recent_history.add(reading_doc)
+    nowcast_engine.update(weather_obj)
+    
+    return weather_data.json().encode("utf-8")
+
 # Weather endpoints
 @api_router.get("/weather/sivas", response_model=WeatherResponse)
 async def get_sivas_weather():
     """Sivas için gerçek zamanlı hava durumu verilerini döndürür"""
     try:
-        weather_data = await weather_service.get_sivas_weather()
-        
-        # Veritabanına kaydet
-        weather_reading = WeatherReadingCreate(
-            location="Sivas",
-            temperature=weather_data.temperature.value,
-            wind_speed=weather_data.windSpeed.value,
-            precipitation=weather_data.precipitation.value,
-            pressure=weather_data.pressure.value,
-            wind_direction=weather_data.windDirection.degrees,
-            wind_direction_text=weather_data.windDirection.value
-        )
-        
-        reading_dict = weather_reading.dict()
-        weather_obj = WeatherReading(**reading_dict)
-        await db.weather_readings.insert_one(weather_obj.dict())
-        
-        return weather_data
+        # Cache'teki JSON doğrudan döndürülür; model yeniden oluşturulmaz
+        payload = await shared_cache.get_or_refresh(WEATHER_CACHE_KEY, refresh_sivas_weather, WEATHER_CACHE_TTL)
+        return SharedJSONResponse(content=payload)
         
     except Exception as e:
         logger.error(f"Weather endpoint error: {str(e)}")
         raise HTTPException(status_code=503, detail=f"Weather service error: {str(e)}")
 
+# Bellek içi durumların en son senkronize olduğu paylaşımlı cache sürümleri
+synced_cache_versions: Dict[str, Optional[float]] = {"history": None, "nowcast": None}
+
+async def sync_worker_state(target: str):
+    """Başka bir worker cache'i yenilediyse onun eklediği okumaları bellek içi duruma alır.
+
+    `target` "history" (son okumalar tamponu) veya "nowcast" (tahmin durumu);
+    her istek yalnızca kullandığı durumu günceller.
+    """
+    version = await shared_cache.version(WEATHER_CACHE_KEY)
+    if version == synced_cache_versions[target]:
+        return
+    # Sürümü bu worker yazdıysa okuması write-through ile zaten eklendi
+    if version != shared_cache.written_version(WEATHER_CACHE_KEY):
+        if target == "history":
+            await recent_history.catch_up(db)
+        else:
+            await nowcast_engine.catch_up(db)
+    synced_cache_versions[target] = version
+
 @api_router.get("/weather/history", response_model=List[WeatherReading])
-async def get_weather_history(limit: int = 24):
+async def get_weather_history(limit: int = 24, location: Optional[str] = None):
     """Son hava durumu kayıtlarını döndürür"""
+    # Boş `?location=` her iki yolda da filtresiz sorgu demektir
+    location = location or None
     try:
-        readings = await db.weather_readings.find().sort("timestamp", -1).limit(limit).to_list(limit)
+        # Küçük limitler bellekteki tampondan, hazır JSON olarak sunulur
+        payload = None
+        if recent_history.covers(limit):
+            try:
+                await sync_worker_state("history")
+                payload = recent_history.serialized(limit, location)
+            except Exception as e:
+                # Cache backend'i erişilemezse tampon güncelliği bilinemez; Mongo'ya düş
+                logger.warning(f"History buffer sync error, falling back to database: {str(e)}")
+        if payload is not None:
+            return Response(content=payload, media_type="application/json")
+        
+        query = {"location": location} if location is not None else {}
+        readings = await db.weather_readings.find(query).sort("timestamp", -1).limit(limit).to_list(limit)
         return [WeatherReading(**reading) for reading in readings]
     except Exception as e:
         logger.error(f"Weather history error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
 
+@api_router.get("/weather/{location}/nowcast", response_model=NowcastResponse)
+async def get_nowcast(location: str, hours: int = Query(3, ge=1, le=12)):
+    """Kayıtlı geçmişe dayalı kısa vadeli (saatlik) tahmin döndürür"""
+    try:
+        await sync_worker_state("nowcast")
+    except Exception as e:
+        logger.warning(f"Nowcast sync error, serving in-memory state: {str(e)}")
+    nowcast = nowcast_engine.forecast(location, hours)
+    if nowcast is None:
+        raise HTTPException(status_code=404, detail=f"No readings available for {location}")
+    return nowcast
+
 # Basic endpoints
 @api_router.get("/")
 async def root():
@@ -102,8 +189,23 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_event():
     logger.info("LEGO Spike Weather Station API starting up...")
+    try:
+        # Lokasyon bazlı sorgular ve worker catch-up'ının zaman aralığı sorgusu için
+        await db.weather_readings.create_index([("location", 1), ("timestamp", 1)])
+        await db.weather_readings.create_index("timestamp")
+    except Exception as e:
+        logger.error(f"Index creation error: {str(e)}")
+    try:
+        await nowcast_engine.load_from_db(db)
+    except Exception as e:
+        logger.error(f"Nowcast rebuild error: {str(e)}")
+    try:
+        await recent_history.warm(db)
+    except Exception as e:
+        logger.error(f"History buffer warm-up error: {str(e)}")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    weather_service.close()
     logger.info("Database connection closed")
\ No newline at end of file
@@ -0,0 +1,246 @@
+import asyncio
+import fcntl
+import logging
+import mmap
+import os
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Tüm worker'ların göreceği varsayılan dizin (tmpfs varsa bellekte kalır)
+_SHM_DIR = Path("/dev/shm")
+
+# En kötü yenileme süresi: upstream (httpx 10 sn) + Mongo sunucu seçimi (30 sn).
+# Kilit süresi ve bekleme süresi bunun üzerinde tutulur; aksi halde kilit
+# yenileme bitmeden düşer veya bekleyenler gereksiz yere hata alır.
+_WAIT_TIMEOUT = 60.0
+_LOCK_TIMEOUT = 120.0
+
+
+def _safe_name(key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+
+
+class FileCacheBackend:
+    """Yerel dosya tabanlı paylaşımlı cache; kilitler flock ile alınır.
+
+    Değer dosyası yalnızca ham içeriği tutar, yazılma zamanı dosyanın
+    mtime'ından okunur. Yazmalar geçici dosya + os.replace ile atomiktir,
+    böylece okuyucular kilit beklemeden her zaman tam bir değer görür.
+    Her süreç değer dosyasını mmap ile eşler ve memoryview döndürür; dosya
+    (inode veya mtime) değişene kadar okumalar kopya yapmaz.
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None, namespace: Optional[str] = None):
+        if directory is None:
+            # Aynı makinedeki farklı kullanıcı/veritabanı dağıtımları birbirinin cache'ini görmez
+            base = _SHM_DIR if _SHM_DIR.is_dir() else Path(tempfile.gettempdir())
+            name = f"weather-cache-{os.getuid()}"
+            if namespace:
+                name += f"-{_safe_name(namespace)}"
+            directory = base / name
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # anahtar -> (inode, mtime_ns, mtime, eşlenmiş görünüm)
+        self._maps: Dict[str, Tuple[int, int, float, memoryview]] = {}
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / f"{_safe_name(key)}{suffix}"
+
+    def _map(self, key: str) -> Optional[Tuple[int, int, float, memoryview]]:
+        try:
+            with open(self._path(key, ".bin"), "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_size == 0:
+                    view = memoryview(b"")
+                else:
+                    view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
+        # Eski eşleme kapatılmaz: dışarı verilmiş görünümler geçerli kalır,
+        # son referans bırakıldığında çöp toplayıcı kapatır
+        entry = (st.st_ino, st.st_mtime_ns, st.st_mtime, view)
+        self._maps[key] = entry
+        return entry
+
+    async def version(self, key: str) -> Optional[float]:
+        try:
+            return os.stat(self._path(key, ".bin")).st_mtime
+        except FileNotFoundError:
+            return None
+
+    async def read(self, key: str) -> Optional[Tuple[float, memoryview]]:
+        try:
+            st = os.stat(self._path(key, ".bin"))
+        except FileNotFoundError:
+            self._maps.pop(key, None)
+            return None
+        entry = self._maps.get(key)
+        if entry is None or entry[0] != st.st_ino or entry[1] != st.st_mtime_ns:
+            entry = self._map(key)
+            if entry is None:
+                return None
+        return entry[2], entry[3]
+
+    async def write(self, key: str, value: bytes) -> float:
+        """Değeri atomik olarak yazar ve yeni sürümü (mtime) döndürür"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+                f.flush()
+                written_at = os.fstat(f.fileno()).st_mtime
+            os.replace(tmp_path, self._path(key, ".bin"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return written_at
+
+    async def acquire(self, key: str) -> Optional[int]:
+        """Kilit alınırsa dosya tanımlayıcısını, başka worker tutuyorsa None döndürür"""
+        fd = os.open(self._path(key, ".lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    async def release(self, key: str, token: int) -> None:
+        try:
+            fcntl.flock(token, fcntl.LOCK_UN)
+        finally:
+            os.close(token)
+
+
+class RedisCacheBackend:
+    """Redis tabanlı paylaşımlı cache (isteğe bağlı, `redis` paketi gerekir)"""
+
+    _RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, lock_timeout: float = _LOCK_TIMEOUT, retention: float = 86400.0):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("WEATHER_CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._client = redis.from_url(url)
+        self.lock_timeout = lock_timeout
+        self.retention = retention
+
+    async def version(self, key: str) -> Optional[float]:
+        written_at = await self._client.hget(key, "t")
+        return float(written_at) if written_at is not None else None
+
+    async def read(self, key: str) -> Optional[Tuple[float, bytes]]:
+        written_at, value = await self._client.hmget(key, "t", "v")
+        if value is None:
+            return None
+        return float(written_at), value
+
+    async def write(self, key: str, value: bytes) -> float:
+        written_at = time.time()
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"t": repr(written_at), "v": value})
+            pipe.expire(key, int(self.retention))
+            await pipe.execute()
+        return written_at
+
+    async def acquire(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await self._client.set(f"{key}:lock", token, nx=True, px=int(self.lock_timeout * 1000)):
+            return token
+        return None
+
+    async def release(self, key: str, token: str) -> None:
+        await self._client.eval(self._RELEASE_SCRIPT, 1, f"{key}:lock", token)
+
+
+class SharedCache:
+    """Worker'lar arası paylaşımlı cache; bir anahtarı aynı anda tek worker yeniler.
+
+    Süresi dolmuş bir değer varsa ve başka bir worker onu yeniliyorsa eski
+    değer sunulur; hiç değer yoksa kilit yeniden denenerek yenileme bitene
+    kadar beklenir, `wait_timeout` aşılırsa TimeoutError fırlatılır.
+    """
+
+    def __init__(self, backend, poll_interval: float = 0.05, wait_timeout: float = _WAIT_TIMEOUT):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.wait_timeout = wait_timeout
+        # Bu sürecin yazdığı son sürümler (kendi yazdığını yeniden okumamak için)
+        self._written: Dict[str, float] = {}
+
+    async def version(self, key: str) -> Optional[float]:
+        """Anahtarın son yazılma zamanı (değer okunmaz); değer yoksa None"""
+        return await self.backend.version(key)
+
+    def written_version(self, key: str) -> Optional[float]:
+        """Bu sürecin anahtara yazdığı son sürüm; hiç yazmadıysa None"""
+        return self._written.get(key)
+
+    async def get_or_refresh(self, key: str, refresh: Callable[[], Awaitable[bytes]], ttl: float) -> Union[bytes, memoryview]:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                cached = await self.backend.read(key)
+                if cached is not None and time.time() - cached[0] < ttl:
+                    return cached[1]
+                token = await self.backend.acquire(key)
+            except Exception as e:
+                # Cache backend zorunlu bir bağımlılık değildir; erişilemezse doğrudan yenilenir
+                logger.warning(f"Shared cache unavailable for {key}, refreshing without it: {e}")
+                return await refresh()
+
+            if token is not None:
+                return await self._refresh_locked(key, token, refresh, ttl)
+
+            if cached is not None:
+                return cached[1]
+
+            if time.monotonic() >= deadline:
+                # Kilitsiz yenileme tüm bekleyenleri aynı anda upstream'e gönderir
+                raise TimeoutError(f"Timed out waiting for shared cache refresh of {key}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _refresh_locked(self, key: str, token: Any, refresh: Callable[[], Awaitable[bytes]], ttl: float) -> Union[bytes, memoryview]:
+        try:
+            # Kilidi beklerken başka bir worker yenilemiş olabilir
+            try:
+                cached = await self.backend.read(key)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed for {key}: {e}")
+                cached = None
+            if cached is not None and time.time() - cached[0] < ttl:
+                return cached[1]
+
+            value = await refresh()
+            try:
+                self._written[key] = await self.backend.write(key, value)
+            except Exception as e:
+                # Yenilenen değer yine de döndürülür; sonraki istek tekrar dener
+                logger.warning(f"Shared cache write failed for {key}: {e}")
+            return value
+        finally:
+            try:
+                await self.backend.release(key, token)
+            except Exception as e:
+                logger.warning(f"Shared cache lock release failed for {key}: {e}")
+
+def create_cache_backend():
+    """WEATHER_CACHE_BACKEND ortam değişkenine göre backend oluşturur (file | redis)"""
+    kind = os.environ.get('WEATHER_CACHE_BACKEND', 'file').lower()
+    if kind == 'file':
+        return FileCacheBackend(os.environ.get('WEATHER_CACHE_DIR'), namespace=os.environ.get('DB_NAME'))
+    if kind == 'redis':
+        return RedisCacheBackend(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+    raise ValueError(f"Unknown WEATHER_CACHE_BACKEND: {kind}")
@@ -0,0 +1,213 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Kayıt dosyasına yazılmayan (yeniden oynatmada anlamsız olan) başlıklar
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+# Kayıt dosyalarının uzantısı; worker dosyaları `<ad>.<pid>-<token>.jsonl.gz`
+_SUFFIX = ".jsonl.gz"
+
+
+def _request_key(method: str, url: Union[str, httpx.URL]) -> str:
+    return f"{method.upper()} {url}"
+
+
+def _base_name(path: Path) -> str:
+    return path.name[:-len(_SUFFIX)] if path.name.endswith(_SUFFIX) else path.name
+
+
+def recording_files(path: Union[str, Path]) -> List[Path]:
+    """Bir kayıt yolu için worker dosyalarını (ve varsa yolun kendisini) döndürür"""
+    path = Path(path)
+    files = sorted(path.parent.glob(f"{_base_name(path)}.*{_SUFFIX}"))
+    if path.is_file():
+        files.insert(0, path)
+    return files
+
+
+def _read_gzip_lines(path: Path) -> List[str]:
+    """Çok üyeli veya sonu kapanmamış (worker kapanmadan okunan) gzip dosyasını okur"""
+    data = path.read_bytes()
+    chunks = []
+    while data:
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        chunks.append(decompressor.decompress(data))
+        data = decompressor.unused_data if decompressor.eof else b""
+    return b"".join(chunks).decode("utf-8", errors="replace").splitlines()
+
+
+class UpstreamRecorder:
+    """Upstream yanıtlarını gecikmeleriyle birlikte gzip'li JSON Lines dosyasına ekler.
+
+    Her worker süreci kendi dosyasına (`<ad>.<pid>-<token>.jsonl.gz`) tek bir
+    gzip akışı yazar; dosyaya tek yazar olduğundan kayıtlar iç içe geçmez ve
+    sıkıştırma sözlüğü kayıtlar arasında korunur. Her kayıttan sonra sync
+    flush yapıldığından dosya kapanmadan da okunabilir.
+    UpstreamReplayer tüm worker dosyalarını `recorded_at` sırasıyla birleştirir.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._raw = None
+        self._stream: Optional[gzip.GzipFile] = None
+
+    def _open(self) -> gzip.GzipFile:
+        pid = os.getpid()
+        if self._stream is None or self._pid != pid:
+            # fork sonrası üst sürecin akışı devralınmaz; her süreç kendi dosyasını açar
+            name = f"{_base_name(self.path)}.{pid}-{uuid.uuid4().hex[:8]}{_SUFFIX}"
+            self._raw = open(self.path.with_name(name), "xb")
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="ab")
+            self._pid = pid
+        return self._stream
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            stream = self._open()
+            stream.write(line.encode("utf-8"))
+            stream.flush()
+            self._raw.flush()
+
+    async def write(self, entry: Dict[str, Any]) -> None:
+        # Dosya G/Ç'si event loop'u bloklamasın
+        await asyncio.to_thread(self.append, entry)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stream is not None and self._pid == os.getpid():
+                self._stream.close()
+                self._raw.close()
+            self._stream = None
+            self._raw = None
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Gerçek isteği iletir, yanıtı ve süresini UpstreamRecorder'a kaydeder"""
+
+    def __init__(self, recorder: UpstreamRecorder, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.recorder = recorder
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry: Dict[str, Any] = {
+            "key": _request_key(request.method, request.url),
+            "recorded_at": datetime.utcnow().isoformat(),
+        }
+        start = time.perf_counter()
+        try:
+            response = await self.inner.handle_async_request(request)
+            body = await response.aread()
+            await response.aclose()
+        except httpx.TransportError as e:
+            entry["latency"] = time.perf_counter() - start
+            entry["error"] = type(e).__name__
+            entry["message"] = str(e)
+            await self.recorder.write(entry)
+            raise
+        entry["latency"] = time.perf_counter() - start
+
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS]
+        entry["status"] = response.status_code
+        entry["headers"] = headers
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(body).decode("ascii")
+        await self.recorder.write(entry)
+
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class UpstreamReplayer:
+    """Kayıtlı yanıtları istek anahtarına göre kayıt sırasıyla (döngüsel) sunar"""
+
+    def __init__(self, path: Union[str, Path], speed: float = 1.0):
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        self.path = Path(path)
+        self.speed = speed
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+
+        files = recording_files(self.path)
+        if not files:
+            raise FileNotFoundError(f"No upstream recordings found for {self.path}")
+
+        entries = []
+        for path in files:
+            for line in _read_gzip_lines(path):
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Kapanmadan kesilmiş dosyanın son satırı
+                    logger.warning(f"Skipping truncated recording line in {path}")
+        # Worker dosyaları kayıt zamanına göre birleştirilir (sıralama kararlı)
+        entries.sort(key=lambda entry: entry["recorded_at"])
+        for entry in entries:
+            self._entries[entry["key"]].append(entry)
+        logger.info(f"Loaded {len(entries)} recorded upstream responses from {len(files)} files for {self.path}")
+
+    def latencies(self, key: Optional[str] = None) -> List[float]:
+        """Kayıtlı gecikmeleri (saniye) döndürür"""
+        groups = [self._entries.get(key, [])] if key else self._entries.values()
+        return [entry["latency"] for group in groups for entry in group]
+
+    def next_entry(self, method: str, url: Union[str, httpx.URL]) -> Optional[Dict[str, Any]]:
+        key = _request_key(method, url)
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+        index = self._cursors[key]
+        self._cursors[key] = (index + 1) % len(entries)
+        return entries[index]
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Kayıtlı yanıtları özgün gecikmeleri (hız katsayısına bölünmüş) ile oynatır"""
+
+    def __init__(self, replayer: UpstreamReplayer):
+        self.replayer = replayer
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self.replayer.next_entry(request.method, request.url)
+        if entry is None:
+            raise httpx.ConnectError(f"No recorded response for {request.method} {request.url}", request=request)
+
+        await asyncio.sleep(entry["latency"] / self.replayer.speed)
+
+        if "error" in entry:
+            error_cls = getattr(httpx, entry["error"], httpx.TransportError)
+            if not (isinstance(error_cls, type) and issubclass(error_cls, httpx.TransportError)):
+                error_cls = httpx.TransportError
+            raise error_cls(entry["message"], request=request)
+
+        if "body_b64" in entry:
+            content = base64.b64decode(entry["body_b64"])
+        else:
+            content = entry["body"].encode("utf-8")
+        return httpx.Response(entry["status"], headers=entry["headers"], content=content, request=request)
@@ -1,19 +1,56 @@
 import httpx
 import os
 from datetime import datetime
-from typing import Dict, Any
+from pathlib import Path
+from typing import Dict, Any, Optional
 import logging
 from models import WeatherResponse, WeatherData, WindDirectionData
+from upstream_recorder import UpstreamRecorder, UpstreamReplayer, RecordingTransport, ReplayTransport
 import random
 import math
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_RECORDING_PATH = Path(__file__).parent / "recordings" / "collectapi.jsonl.gz"
+
 class WeatherService:
     def __init__(self):
         self.api_token = os.environ.get('COLLECTAPI_TOKEN')
         self.base_url = "https://api.collectapi.com"
         
+        # Upstream modu: live (varsayılan), record veya replay
+        self.upstream_mode = os.environ.get('COLLECTAPI_MODE', 'live').lower()
+        recording_path = os.environ.get('COLLECTAPI_RECORDING', str(DEFAULT_RECORDING_PATH))
+        self._recorder: Optional[UpstreamRecorder] = None
+        self._replayer: Optional[UpstreamReplayer] = None
+        # Üretilen ek veriler ve mock için rastgelelik kaynağı
+        self._random = random.Random()
+        
+        if self.upstream_mode == 'record':
+            self._recorder = UpstreamRecorder(recording_path)
+            logger.info(f"Recording CollectAPI responses to {recording_path}")
+        elif self.upstream_mode == 'replay':
+            speed = float(os.environ.get('COLLECTAPI_REPLAY_SPEED', '1.0'))
+            self._replayer = UpstreamReplayer(recording_path, speed=speed)
+            # Replay çalıştırmaları tekrarlanabilir olsun diye sabit tohum
+            self._random = random.Random(int(os.environ.get('COLLECTAPI_REPLAY_SEED', '0')))
+            logger.info(f"Replaying CollectAPI responses from {recording_path} at {speed}x speed")
+        elif self.upstream_mode != 'live':
+            raise ValueError(f"Unknown COLLECTAPI_MODE: {self.upstream_mode}")
+    
+    def _make_transport(self) -> Optional[httpx.AsyncBaseTransport]:
+        """Moda göre HTTP transport'u oluşturur (live modda httpx varsayılanı)"""
+        if self._recorder is not None:
+            return RecordingTransport(self._recorder)
+        if self._replayer is not None:
+            return ReplayTransport(self._replayer)
+        return None
+
+    def close(self) -> None:
+        """Kayıt akışını kapatır (gzip sonu yazılır)"""
+        if self._recorder is not None:
+            self._recorder.close()
+        
     def _get_wind_direction_text(self, degrees: int) -> str:
         """Rüzgar yönünü derece cinsinden metne çevirir"""
         directions = [
@@ -26,7 +63,7 @@ class WeatherService:
     def _determine_trend(self, current_value: float, parameter: str) -> str:
         """Trend belirleme"""
         trends = ["increasing", "decreasing", "stable"]
-        return random.choice(trends)
+        return self._random.choice(trends)
     
     def _generate_sivas_realistic_weather(self) -> Dict[str, Any]:
         """Sivas için gerçekçi hava durumu verileri üretir (mevsimsel)"""
@@ -47,28 +84,28 @@ class WeatherService:
         # Günlük sıcaklık dalgalanması (sabah soğuk, öğlen sıcak)
         daily_variation = math.sin((hour - 6) * math.pi / 12) * 0.4
         base_temp = min_temp + (max_temp - min_temp) * (0.6 + daily_variation)
-        temperature = base_temp + random.uniform(-3, 3)
+        temperature = base_temp + self._random.uniform(-3, 3)
         
         # Nem (kış yüksek, yaz düşük)
         base_humidity = 70 if month in [12, 1, 2] else (50 if month in [6, 7, 8] else 60)
-        humidity = base_humidity + random.randint(-15, 15)
+        humidity = base_humidity + self._random.randint(-15, 15)
         humidity = max(30, min(95, humidity))
         
         # Basınç (gerçekçi aralık)
-        pressure = 1013.25 + random.uniform(-15, 15)
+        pressure = 1013.25 + self._random.uniform(-15, 15)
         
         # Rüzgar (Sivas'ta genelde orta düzey rüzgar)
-        wind_speed = random.uniform(3, 12)
-        wind_direction_deg = random.randint(0, 359)
+        wind_speed = self._random.uniform(3, 12)
+        wind_direction_deg = self._random.randint(0, 359)
         
         # Yağış (kış ve ilkbaharda daha fazla)
         precipitation = 0
         if month in [12, 1, 2, 3, 4, 5]:  # Kış-İlkbahar
-            if random.random() < 0.3:  # %30 yağış şansı
-                precipitation = random.uniform(0.1, 4.0)
+            if self._random.random() < 0.3:  # %30 yağış şansı
+                precipitation = self._random.uniform(0.1, 4.0)
         else:  # Yaz-Sonbahar
-            if random.random() < 0.1:  # %10 yağış şansı
-                precipitation = random.uniform(0.1, 2.0)
+            if self._random.random() < 0.1:  # %10 yağış şansı
+                precipitation = self._random.uniform(0.1, 2.0)
         
         return {
             "temperature": temperature,
@@ -83,7 +120,7 @@ class WeatherService:
         """Sivas için hava durumu verilerini döndürür (API sorunu nedeniyle gerçekçi mock)"""
         try:
             # Önce gerçek API'yi dene
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(transport=self._make_transport()) as client:
                 response = await client.get(
                     f"{self.base_url}/weather/getWeather",
                     params={
@@ -194,16 +231,16 @@ class WeatherService:
         """CollectAPI'de olmayan verileri generate et (rüzgar, basınç, yağış)"""
         base_pressure = 1013.25
         temp_adjustment = (temp - 15) * -0.5
-        pressure = base_pressure + temp_adjustment + random.uniform(-5, 5)
+        pressure = base_pressure + temp_adjustment + self._random.uniform(-5, 5)
         
-        wind_speed = random.uniform(2, 12)
-        wind_direction_deg = random.randint(0, 359)
+        wind_speed = self._random.uniform(2, 12)
+        wind_direction_deg = self._random.randint(0, 359)
         
         precipitation = 0
         if humidity > 80:
-            precipitation = random.uniform(0, 3)
+            precipitation = self._random.uniform(0, 3)
         elif humidity > 60:
-            precipitation = random.uniform(0, 1)
+            precipitation = self._random.uniform(0, 1)
             
         return {
             "pressure": pressure,
@@ -201,6 +201,140 @@ class WeatherStationTester:
             self.log_test("Weather History Endpoint", False, f"Exception: {str(e)}")
             return False
     
+    def check_history_records(self, data):
+        """Return an error message if history records are malformed, else None"""
+        if not isinstance(data, list):
+            return "Response is not a list"
+        required_fields = ["id", "location", "temperature", "wind_speed", "precipitation", "pressure", "wind_direction", "timestamp"]
+        for record in data:
+            missing_fields = [field for field in required_fields if field not in record]
+            if missing_fields:
+                return f"Missing fields in history record: {missing_fields}"
+        timestamps = [record["timestamp"] for record in data]
+        if timestamps != sorted(timestamps, reverse=True):
+            return "Records are not sorted by timestamp (newest first)"
+        return None
+    
+    async def test_weather_history_location_filter(self):
+        """Test the history endpoint with a location filter (served from the buffer)"""
+        try:
+            await self.client.get(f"{API_BASE}/weather/sivas")
+            response = await self.client.get(f"{API_BASE}/weather/history", params={"location": "Sivas", "limit": 24})
+            
+            if response.status_code != 200:
+                self.log_test("Weather History Location Filter", False, f"HTTP {response.status_code}: {response.text}")
+                return False
+            
+            data = response.json()
+            error = self.check_history_records(data)
+            if error:
+                self.log_test("Weather History Location Filter", False, error)
+                return False
+            
+            if not data or any(record["location"] != "Sivas" for record in data):
+                self.log_test("Weather History Location Filter", False, "Expected only Sivas records")
+                return False
+            
+            if len(data) > 24:
+                self.log_test("Weather History Location Filter", False, f"Limit not respected: {len(data)} records")
+                return False
+            
+            # Unknown locations return an empty list
+            unknown = await self.client.get(f"{API_BASE}/weather/history", params={"location": "Atlantis"})
+            if unknown.status_code != 200 or unknown.json() != []:
+                self.log_test("Weather History Location Filter", False, f"Expected [] for unknown location, got {unknown.status_code}: {unknown.text}")
+                return False
+            
+            self.log_test("Weather History Location Filter", True, f"Retrieved {len(data)} Sivas records")
+            return True
+            
+        except Exception as e:
+            self.log_test("Weather History Location Filter", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_weather_history_deep_limit(self):
+        """Test that a limit above HISTORY_BUFFER_SIZE (database path) returns the same shape"""
+        try:
+            buffered = await self.client.get(f"{API_BASE}/weather/history", params={"limit": 24})
+            deep = await self.client.get(f"{API_BASE}/weather/history", params={"limit": 500})
+            
+            if buffered.status_code != 200 or deep.status_code != 200:
+                self.log_test("Weather History Deep Limit", False, f"HTTP {buffered.status_code}/{deep.status_code}")
+                return False
+            
+            buffered_data, deep_data = buffered.json(), deep.json()
+            for data in (buffered_data, deep_data):
+                error = self.check_history_records(data)
+                if error:
+                    self.log_test("Weather History Deep Limit", False, error)
+                    return False
+            
+            if len(deep_data) > 500 or len(deep_data) < len(buffered_data):
+                self.log_test("Weather History Deep Limit", False, f"Unexpected record count: {len(deep_data)}")
+                return False
+            
+            # Both paths must agree on the overlapping (newest) records
+            overlap = min(len(buffered_data), len(deep_data))
+            if buffered_data[:overlap] != deep_data[:overlap]:
+                self.log_test("Weather History Deep Limit", False, "Buffer and database results differ for the newest records")
+                return False
+            
+            if deep_data and set(deep_data[0]) != set(buffered_data[0]):
+                self.log_test("Weather History Deep Limit", False, "Buffer and database records have different fields")
+                return False
+            
+            self.log_test("Weather History Deep Limit", True, f"Database path returned {len(deep_data)} records matching the buffer shape")
+            return True
+            
+        except Exception as e:
+            self.log_test("Weather History Deep Limit", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_nowcast_endpoint(self):
+        """Test the short-term nowcast endpoint"""
+        try:
+            # Ensure at least one reading exists for Sivas
+            await self.client.get(f"{API_BASE}/weather/sivas")
+            response = await self.client.get(f"{API_BASE}/weather/sivas/nowcast", params={"hours": 3})
+            
+            if response.status_code != 200:
+                self.log_test("Nowcast Endpoint", False, f"HTTP {response.status_code}: {response.text}")
+                return False
+            
+            data = response.json()
+            required_fields = ["location", "basedOn", "lastReading", "points"]
+            missing_fields = [field for field in required_fields if field not in data]
+            
+            if missing_fields:
+                self.log_test("Nowcast Endpoint", False, f"Missing fields: {missing_fields}")
+                return False
+            
+            if len(data["points"]) != 3:
+                self.log_test("Nowcast Endpoint", False, f"Expected 3 hourly points, got {len(data['points'])}")
+                return False
+            
+            for point in data["points"]:
+                missing_point_fields = [field for field in ["time", "temperature", "pressure", "windSpeed"] if field not in point]
+                if missing_point_fields:
+                    self.log_test("Nowcast Endpoint", False, f"Missing fields in nowcast point: {missing_point_fields}")
+                    return False
+                if point["windSpeed"] < 0:
+                    self.log_test("Nowcast Endpoint", False, f"Negative wind speed forecast: {point['windSpeed']}")
+                    return False
+            
+            # Unknown locations should return 404
+            unknown = await self.client.get(f"{API_BASE}/weather/atlantis/nowcast")
+            if unknown.status_code != 404:
+                self.log_test("Nowcast Endpoint", False, f"Expected 404 for unknown location, got {unknown.status_code}")
+                return False
+            
+            self.log_test("Nowcast Endpoint", True, f"Nowcast based on {data['basedOn']} readings: {json.dumps(data['points'][0])}")
+            return True
+            
+        except Exception as e:
+            self.log_test("Nowcast Endpoint", False, f"Exception: {str(e)}")
+            return False
+    
     async def test_data_storage(self):
         """Test that weather data is being stored by making multiple requests"""
         try:
@@ -304,7 +438,10 @@ class WeatherStationTester:
             ("Health Check", self.test_health_endpoint),
             ("Sivas Weather API", self.test_sivas_weather_endpoint),
             ("Weather History", self.test_weather_history_endpoint),
+            ("Weather History Location Filter", self.test_weather_history_location_filter),
+            ("Weather History Deep Limit", self.test_weather_history_deep_limit),
             ("Data Storage", self.test_data_storage),
+            ("Nowcast", self.test_nowcast_endpoint),
             ("Error Handling", self.test_error_handling),
             ("Turkish Localization", self.test_turkish_localization),
         ]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Nowcast Rebuild Benchmark
+Measures the startup rebuild of NowcastEngine for a year of per-minute readings
+"""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path for imports
+backend_path = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+from nowcast import NowcastEngine, NOWCAST_FIELDS
+from models import WeatherReading
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+REPEATS = 5
+
+def generate_year(seed: int = 42):
+    """Bir yıllık dakikalık sentetik okuma üretir"""
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(MINUTES_PER_YEAR)
+    timestamps = np.datetime64("2024-01-01T00:00") + minutes.astype("timedelta64[m]")
+
+    day_phase = 2 * np.pi * minutes / (24 * 60)
+    year_phase = 2 * np.pi * minutes / MINUTES_PER_YEAR
+    temperature = 10 - 12 * np.cos(year_phase) + 6 * np.sin(day_phase) + rng.normal(0, 0.5, MINUTES_PER_YEAR)
+    pressure = 1013.25 + np.cumsum(rng.normal(0, 0.05, MINUTES_PER_YEAR)).clip(-25, 25)
+    wind_speed = np.abs(6 + np.cumsum(rng.normal(0, 0.05, MINUTES_PER_YEAR)).clip(-6, 10))
+
+    values = np.column_stack([temperature, pressure, wind_speed])
+    assert values.shape[1] == len(NOWCAST_FIELDS)
+    return timestamps, values
+
+def to_documents(timestamps, values):
+    """Mongo'dan dönen kayıtlar gibi sözlük listesi üretir"""
+    stamps = timestamps.astype("datetime64[us]").astype(datetime)
+    return [
+        {"location": "Sivas", "timestamp": ts, "temperature": row[0], "pressure": row[1], "wind_speed": row[2]}
+        for ts, row in zip(stamps, values.tolist())
+    ]
+
+def best_of(func, repeats=REPEATS):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return min(durations), sorted(durations)[repeats // 2]
+
+def main():
+    timestamps, values = generate_year()
+    documents = to_documents(timestamps, values)
+    print(f"📦 Readings: {len(documents)} (1 year, per-minute)")
+
+    engine = NowcastEngine()
+    depth = engine.history_depth
+
+    # Başlangıçta load_from_db her lokasyon için yalnızca son history_depth kaydı çeker
+    best, median = best_of(lambda: engine.rebuild(documents[-depth:], {"sivas": len(documents)}))
+    print(f"🚀 Startup rebuild from last {depth} documents: best {best * 1000:.2f} ms, median {median * 1000:.2f} ms")
+
+    # Referans: tüm yılın belgelerinden yeniden kurulum (tam koleksiyon taraması)
+    best, median = best_of(lambda: engine.rebuild(documents), repeats=3)
+    print(f"🐢 Rebuild from all documents: best {best * 1000:.1f} ms, median {median * 1000:.1f} ms")
+
+    best, median = best_of(lambda: engine.rebuild_location("Sivas", timestamps, values))
+    print(f"⏱️  Numpy kernel only (pre-built arrays): best {best * 1000:.1f} ms, median {median * 1000:.1f} ms")
+    print("   (Mongo fetch time for the limited query is not included)")
+
+    # Referans: aynı veriyi O(1) güncellemelerle tek tek işlemek
+    sample = 50_000
+    readings = [WeatherReading(precipitation=0.0, wind_direction=0, wind_direction_text="N", **doc) for doc in documents[:sample]]
+    incremental = NowcastEngine()
+    start = time.perf_counter()
+    for reading in readings:
+        incremental.update(reading)
+    elapsed = time.perf_counter() - start
+    print(f"🔁 Incremental update: {elapsed / sample * 1e6:.1f} µs/reading "
+          f"(~{elapsed / sample * MINUTES_PER_YEAR:.1f} s for a full year)")
+
+    vectorized = NowcastEngine()
+    vectorized.rebuild(documents[:sample][-depth:])
+    drift = np.max(np.abs(incremental._states["sivas"].state - vectorized._states["sivas"].state))
+    print(f"✅ Max state difference (incremental vs tail rebuild): {drift:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Upstream Replay Benchmark
+Replays recorded CollectAPI responses through WeatherService and compares
+the observed latency distribution with the recorded one
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path for imports
+backend_path = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+from weather_service import DEFAULT_RECORDING_PATH
+
+def percentiles(values):
+    """p50 / p95 / max değerlerini milisaniye olarak döndürür"""
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, max {ordered[-1] * 1000:.1f} ms"
+
+async def run(calls: int, concurrency: int):
+    from weather_service import WeatherService
+
+    service = WeatherService()
+    recorded = service._replayer.latencies()
+    semaphore = asyncio.Semaphore(concurrency)
+    observed = []
+
+    async def one_call():
+        async with semaphore:
+            start = time.perf_counter()
+            await service.get_sivas_weather()
+            observed.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_call() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    speed = service._replayer.speed
+    print(f"📼 Recorded ({len(recorded)} responses, scaled 1/{speed}): "
+          f"{percentiles([latency / speed for latency in recorded])}")
+    print(f"🔁 Observed ({calls} calls, concurrency {concurrency}): {percentiles(observed)}")
+    print(f"⏱️  Total: {elapsed:.2f} s ({calls / elapsed:.1f} calls/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recording", default=str(DEFAULT_RECORDING_PATH))
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ["COLLECTAPI_MODE"] = "replay"
+    os.environ["COLLECTAPI_RECORDING"] = args.recording
+    os.environ["COLLECTAPI_REPLAY_SPEED"] = str(args.speed)
+    asyncio.run(run(args.calls, args.concurrency))
+
+if __name__ == "__main__":
+    main()
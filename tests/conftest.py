@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+
+# Add backend to path for imports
+backend_path = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+import copy
+import importlib.util
+
+import pytest
+
+
+def _matches(document, query):
+    for field, condition in query.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = documents
+
+    def sort(self, field, direction):
+        self._documents.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self._documents if length is None else self._documents[:length]
+
+
+class FakeCollection:
+    """Testler için weather_readings'in kullanılan alt kümesi (bellekte)"""
+
+    def __init__(self):
+        self.documents = []
+        self.indexes = []
+        self.queries = []
+
+    async def insert_one(self, document):
+        stored = copy.deepcopy(document)
+        # Mongo tarihleri milisaniye hassasiyetinde saklar
+        stored["timestamp"] = stored["timestamp"].replace(microsecond=stored["timestamp"].microsecond // 1000 * 1000)
+        self.documents.append(stored)
+
+    async def create_index(self, keys):
+        self.indexes.append(keys)
+
+    def find(self, query=None, projection=None):
+        self.queries.append(query or {})
+        return FakeCursor([copy.deepcopy(d) for d in self.documents if _matches(d, query or {})])
+
+    async def distinct(self, field):
+        self.queries.append(("distinct", field))
+        return sorted({d[field] for d in self.documents})
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.documents if _matches(d, query))
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.weather_readings = FakeCollection()
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def load_worker(monkeypatch, tmp_path):
+    """server.py'yi ayrı bir uvicorn worker'ı gibi bağımsız modül olarak yükler"""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("motor")
+    monkeypatch.setenv("WEATHER_CACHE_BACKEND", "file")
+    monkeypatch.setenv("WEATHER_CACHE_DIR", str(tmp_path / "cache"))
+
+    def load(name, db):
+        spec = importlib.util.spec_from_file_location(name, backend_path / "server.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.db = db
+        return module
+
+    return load
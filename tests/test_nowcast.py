@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from models import WeatherReading
+from nowcast import NowcastEngine
+
+
+def _readings(count, location="Sivas", seed=7):
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    # Düzensiz aralıklı okumalar
+    offsets = np.cumsum(rng.integers(30, 900, count))
+    return [
+        WeatherReading(
+            location=location,
+            temperature=float(10 + 5 * np.sin(i / 50) + rng.normal(0, 0.3)),
+            pressure=float(1013 + rng.normal(0, 2)),
+            wind_speed=float(abs(6 + rng.normal(0, 1))),
+            precipitation=0.0,
+            wind_direction=0,
+            wind_direction_text="N",
+            timestamp=start + timedelta(seconds=int(offset)),
+        )
+        for i, offset in enumerate(offsets)
+    ]
+
+
+def _incremental(readings):
+    engine = NowcastEngine()
+    for reading in readings:
+        engine.update(reading)
+    return engine
+
+
+def test_rebuild_location_matches_incremental_updates():
+    readings = _readings(2000)
+    incremental = _incremental(readings)
+
+    rebuilt = NowcastEngine()
+    timestamps = np.array([r.timestamp for r in readings], dtype="datetime64[us]")
+    values = np.array([[r.temperature, r.pressure, r.wind_speed] for r in readings])
+    rebuilt.rebuild_location("Sivas", timestamps, values)
+
+    expected = incremental._states["sivas"]
+    actual = rebuilt._states["sivas"]
+    np.testing.assert_allclose(actual.state, expected.state, atol=1e-9)
+    assert abs(actual.interval - expected.interval) < 1e-6
+    assert actual.last_timestamp == expected.last_timestamp
+    assert actual.count == expected.count
+
+
+def test_rebuild_from_history_depth_tail_matches_full_history():
+    readings = _readings(3000)
+    documents = [r.model_dump() for r in readings]
+    incremental = _incremental(readings)
+
+    engine = NowcastEngine()
+    engine.rebuild(documents[-engine.history_depth:], {"sivas": len(documents)})
+
+    np.testing.assert_allclose(engine._states["sivas"].state, incremental._states["sivas"].state, atol=1e-9)
+    assert abs(engine._states["sivas"].interval - incremental._states["sivas"].interval) < 1e-6
+    assert engine._states["sivas"].count == len(documents)
+
+
+def test_short_history_matches_incremental_updates():
+    for count in (1, 2, 5):
+        readings = _readings(count)
+        engine = NowcastEngine()
+        engine.rebuild([r.model_dump() for r in readings])
+        np.testing.assert_allclose(engine._states["sivas"].state, _incremental(readings)._states["sivas"].state, atol=1e-9)
+
+
+def test_forecast_returns_stored_location_name():
+    readings = _readings(50)
+    rebuilt = NowcastEngine()
+    rebuilt.rebuild([r.model_dump() for r in readings])
+    for engine in (_incremental(readings), rebuilt):
+        # Lookup büyük/küçük harf duyarsız, yanıt ise history ile aynı adı taşır
+        assert engine.forecast("SIVAS", 2).location == "Sivas"
+        assert engine.forecast(" sivas ", 2).location == "Sivas"
+        assert len(engine.forecast("sivas", 2).points) == 2
+        assert engine.forecast("ankara") is None
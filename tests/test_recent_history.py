@@ -0,0 +1,105 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from models import WeatherReading
+from recent_history import RecentHistory
+
+START = datetime(2025, 1, 1)
+
+
+def _reading(location="Sivas", minutes=0, temperature=10.0, **extra):
+    return WeatherReading(
+        location=location, temperature=temperature, wind_speed=5.0, precipitation=0.0, pressure=1013.0,
+        wind_direction=45, wind_direction_text="NE", timestamp=START + timedelta(minutes=minutes), **extra,
+    ).model_dump()
+
+
+def _history(capacity=5):
+    history = RecentHistory(capacity)
+    history.ready = True
+    return history
+
+
+def test_serves_latest_readings_newest_first_across_locations():
+    history = _history()
+    for minute in range(12):
+        history.add(_reading("Sivas" if minute % 3 else "Ankara", minute, temperature=minute))
+
+    rows = json.loads(history.serialized(4))
+    assert [row["temperature"] for row in rows] == [11, 10, 9, 8]
+    assert len(json.loads(history.serialized(5, "Sivas"))) == 5
+    assert history.serialized(6) is None  # kapasiteden derin: Mongo'ya düşülür
+
+
+def test_serialized_payload_matches_model_shape():
+    history = _history()
+    reading = _reading(humidity=55)
+    history.add(reading)
+    row = json.loads(history.serialized(1))[0]
+    expected = json.loads(WeatherReading(**reading).model_dump_json())
+    # Mongo milisaniye hassasiyetinde saklar
+    assert row == expected
+
+
+def test_json_is_cached_between_inserts():
+    history = _history()
+    history.add(_reading(minutes=0))
+    first = history.serialized(1)
+    assert history.serialized(1) is first
+    history.add(_reading(minutes=1))
+    assert history.serialized(1) is not first
+
+
+def test_unknown_locations_are_not_cached():
+    history = _history()
+    history.add(_reading())
+    for i in range(100):
+        assert history.serialized(4 if i % 2 else 3, f"nowhere-{i}") == b"[]"
+    history.serialized(3)
+    history.serialized(3, "Sivas")
+    assert len(history._serialized) == 2
+
+
+def test_readings_in_the_same_millisecond_are_kept_and_deduplicated_by_id():
+    history = _history()
+    first = _reading(temperature=1.0)
+    second = _reading(temperature=2.0)
+    second["timestamp"] = first["timestamp"]
+    history.add(first)
+    history.add(second)
+    history.add(first)
+    assert [row["temperature"] for row in json.loads(history.serialized(5, "Sivas"))] == [2.0, 1.0]
+
+
+def test_catch_up_uses_one_query_from_oldest_location(fake_db):
+    async def run():
+        history = RecentHistory(5)
+        for reading in (_reading("Sivas", 0), _reading("Ankara", 1)):
+            await fake_db.weather_readings.insert_one(reading)
+        await history.warm(fake_db)
+
+        # Bu worker Sivas'ın daha yeni bir okumasını yazdı...
+        newer = _reading("Sivas", 10)
+        await fake_db.weather_readings.insert_one(newer)
+        history.add(newer)
+        # ...başka bir worker ise Ankara için daha eski zamanlı iki okuma ekledi
+        same_ms = _reading("Ankara", 5)
+        twin = _reading("Ankara", 5)
+        for reading in (same_ms, twin):
+            await fake_db.weather_readings.insert_one(reading)
+
+        fake_db.weather_readings.queries.clear()
+        await history.catch_up(fake_db)
+        await history.catch_up(fake_db)
+        return history
+
+    history = asyncio.run(run())
+    # Lokasyon başına sorgu yok: en eski son okumadan tek zaman aralığı sorgusu
+    assert fake_db.weather_readings.queries == [
+        {"timestamp": {"$gte": START + timedelta(minutes=1)}},
+        {"timestamp": {"$gte": START + timedelta(minutes=5)}},
+    ]
+    assert len(json.loads(history.serialized(5, "Ankara"))) == 3
+    assert len(json.loads(history.serialized(5, "Sivas"))) == 2
+    assert len(json.loads(history.serialized(5))) == 5
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from models import WeatherReading, WeatherResponse, WeatherData, WindDirectionData
+
+
+def _weather(temperature):
+    data = lambda value, unit, icon: WeatherData(value=value, unit=unit, trend="stable", icon=icon)
+    return WeatherResponse(
+        temperature=data(temperature, "°C", "thermometer"),
+        windSpeed=data(5.0, "m/s", "wind"),
+        precipitation=data(0.0, "mm", "cloud-rain"),
+        pressure=data(1013.0, "hPa", "gauge"),
+        windDirection=WindDirectionData(value="N", degrees=0, unit="°", trend="stable", icon="compass"),
+        location="Sivas, Türkiye",
+        lastUpdate=datetime.utcnow(),
+    )
+
+
+async def _seed(db, count):
+    start = datetime.utcnow() - timedelta(hours=count)
+    for i in range(count):
+        reading = WeatherReading(
+            location="Sivas", temperature=10.0, wind_speed=5.0, precipitation=0.0, pressure=1013.0,
+            wind_direction=0, wind_direction_text="N", timestamp=start + timedelta(hours=i),
+        )
+        await db.weather_readings.insert_one(reading.model_dump())
+
+
+def test_nowcast_advances_on_worker_that_did_not_refresh(fake_db, load_worker, monkeypatch):
+    monkeypatch.setenv("WEATHER_CACHE_TTL", "0")  # her istek yenileme yapsın
+    worker_a = load_worker("server_worker_a", fake_db)
+    worker_b = load_worker("server_worker_b", fake_db)
+
+    async def run():
+        await _seed(fake_db, 20)
+        await worker_a.startup_event()
+        await worker_b.startup_event()
+        before = await worker_b.get_nowcast("sivas", 1)
+
+        temperatures = iter([14.0, 18.0, 22.0])
+
+        async def upstream():
+            return _weather(next(temperatures))
+
+        monkeypatch.setattr(worker_a.weather_service, "get_sivas_weather", upstream)
+        for _ in range(3):
+            await worker_a.get_sivas_weather()
+            time.sleep(0.002)
+
+        after_b = await worker_b.get_nowcast("sivas", 1)
+        after_a = await worker_a.get_nowcast("sivas", 1)
+        return before, after_a, after_b
+
+    before, after_a, after_b = asyncio.run(run())
+    assert before.basedOn == 20
+    assert after_b.basedOn == 23
+    assert after_b.points[0].temperature > before.points[0].temperature
+    assert after_b.points[0].temperature == after_a.points[0].temperature
+
+
+def test_history_falls_back_to_database_when_cache_version_fails(fake_db, load_worker, monkeypatch):
+    worker = load_worker("server_worker_history", fake_db)
+
+    async def unavailable(key):
+        raise ConnectionError("cache backend down")
+
+    async def run():
+        await _seed(fake_db, 5)
+        await worker.startup_event()
+        monkeypatch.setattr(worker.shared_cache.backend, "version", unavailable)
+        return await worker.get_weather_history(limit=3)
+
+    readings = asyncio.run(run())
+    assert [r.timestamp for r in readings] == sorted((r.timestamp for r in readings), reverse=True)
+    assert len(readings) == 3
+
+
+def test_history_buffer_and_database_paths_agree(fake_db, load_worker, monkeypatch):
+    monkeypatch.setenv("HISTORY_BUFFER_SIZE", "10")
+    worker = load_worker("server_worker_paths", fake_db)
+
+    async def run():
+        await _seed(fake_db, 15)
+        await worker.startup_event()
+        buffered = await worker.get_weather_history(limit=5, location="Sivas")
+        deep = await worker.get_weather_history(limit=50, location="Sivas")
+        return buffered, deep
+
+    buffered, deep = asyncio.run(run())
+    # Tampon yolu hazır JSON döner, derin sorgu Mongo'dan model listesi
+    buffered_rows = json.loads(bytes(buffered.body))
+    deep_rows = [json.loads(r.model_dump_json()) for r in deep]
+    assert len(buffered_rows) == 5
+    assert len(deep_rows) == 15
+    assert buffered_rows == deep_rows[:5]
+
+
+def _count_catch_ups(monkeypatch, worker):
+    calls = []
+    for name, target in (("history", worker.recent_history), ("nowcast", worker.nowcast_engine)):
+        original = target.catch_up
+
+        async def counted(db, name=name, original=original):
+            calls.append(name)
+            await original(db)
+
+        monkeypatch.setattr(target, "catch_up", counted)
+    return calls
+
+
+def test_each_request_syncs_only_the_state_it_uses(fake_db, load_worker, monkeypatch):
+    monkeypatch.setenv("WEATHER_CACHE_TTL", "0")
+    monkeypatch.setenv("HISTORY_BUFFER_SIZE", "10")
+    worker_a = load_worker("server_worker_sync_a", fake_db)
+    worker_b = load_worker("server_worker_sync_b", fake_db)
+
+    async def upstream():
+        return _weather(15.0)
+
+    async def run():
+        await _seed(fake_db, 5)
+        await worker_a.startup_event()
+        await worker_b.startup_event()
+        calls_a = _count_catch_ups(monkeypatch, worker_a)
+        calls_b = _count_catch_ups(monkeypatch, worker_b)
+        monkeypatch.setattr(worker_a.weather_service, "get_sivas_weather", upstream)
+        await worker_a.get_sivas_weather()
+
+        # Kendi yazdığı sürüm için worker A Mongo'ya gitmez
+        await worker_a.get_weather_history(limit=3)
+        await worker_a.get_nowcast("sivas", 1)
+
+        # Kapasiteden derin sorgu tampona bakmaz, senkronizasyon da yapmaz
+        await worker_b.get_weather_history(limit=50)
+        assert calls_b == []
+        await worker_b.get_nowcast("sivas", 1)
+        assert calls_b == ["nowcast"]
+        await worker_b.get_weather_history(limit=3)
+        await worker_b.get_weather_history(limit=3)
+        return calls_a, calls_b
+
+    calls_a, calls_b = asyncio.run(run())
+    assert calls_a == []
+    assert calls_b == ["nowcast", "history"]
+    assert [("location", 1), ("timestamp", 1)] in fake_db.weather_readings.indexes
+
+
+def test_empty_location_is_unfiltered_on_both_paths(fake_db, load_worker, monkeypatch):
+    monkeypatch.setenv("HISTORY_BUFFER_SIZE", "10")
+    worker = load_worker("server_worker_empty_location", fake_db)
+
+    async def run():
+        await _seed(fake_db, 15)
+        await worker.startup_event()
+        buffered = await worker.get_weather_history(limit=5, location="")
+        deep = await worker.get_weather_history(limit=50, location="")
+        return buffered, deep
+
+    buffered, deep = asyncio.run(run())
+    assert len(json.loads(bytes(buffered.body))) == 5
+    assert len(deep) == 15
@@ -0,0 +1,141 @@
+import asyncio
+import multiprocessing
+
+from shared_cache import SharedCache, FileCacheBackend
+
+PAYLOAD = b'{"temperature": {"value": 12.5}}'
+
+
+def _refresher(directory, delay=0.3):
+    async def refresh():
+        # Yenileme sayısını süreçler arası sayabilmek için dosyaya işaret bırak
+        with open(f"{directory}/refreshes", "a") as f:
+            f.write("x")
+        await asyncio.sleep(delay)
+        return PAYLOAD
+    return refresh
+
+
+def _worker(directory, tasks):
+    async def run():
+        cache = SharedCache(FileCacheBackend(directory), poll_interval=0.01)
+        results = await asyncio.gather(*(cache.get_or_refresh("weather:sivas", _refresher(directory), 60) for _ in range(tasks)))
+        assert all(bytes(result) == PAYLOAD for result in results)
+    asyncio.run(run())
+
+
+def _refresh_count(directory):
+    with open(f"{directory}/refreshes") as f:
+        return len(f.read())
+
+
+def test_single_refresher_across_processes(tmp_path):
+    processes = [multiprocessing.Process(target=_worker, args=(str(tmp_path), 5)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+    assert _refresh_count(tmp_path) == 1
+
+
+def test_single_refresher_across_tasks(tmp_path):
+    _worker(str(tmp_path), 20)
+    assert _refresh_count(tmp_path) == 1
+
+
+def test_stale_value_served_while_another_worker_refreshes(tmp_path):
+    async def run():
+        backend = FileCacheBackend(tmp_path)
+        await backend.write("weather:sivas", b"stale")
+        cache = SharedCache(backend)
+        token = await FileCacheBackend(tmp_path).acquire("weather:sivas")
+        assert token is not None
+        # ttl=0: değer eskimiş, ama kilit başka worker'da
+        return await cache.get_or_refresh("weather:sivas", _refresher(str(tmp_path)), 0)
+
+    assert bytes(asyncio.run(run())) == b"stale"
+
+
+def test_file_backend_reuses_mapping_until_file_changes(tmp_path):
+    async def run():
+        backend = FileCacheBackend(tmp_path)
+        await backend.write("weather:sivas", b"first")
+        _, first = await backend.read("weather:sivas")
+        _, again = await backend.read("weather:sivas")
+        assert isinstance(first, memoryview)
+        assert again is first
+
+        await FileCacheBackend(tmp_path).write("weather:sivas", b"second value")
+        _, second = await backend.read("weather:sivas")
+        # Eski görünüm yeniden eşlemeden sonra da geçerli kalır
+        return bytes(first), bytes(second)
+
+    assert asyncio.run(run()) == (b"first", b"second value")
+
+
+def test_version_does_not_read_value(tmp_path):
+    async def run():
+        backend = FileCacheBackend(tmp_path)
+        assert await SharedCache(backend).version("weather:sivas") is None
+        await backend.write("weather:sivas", PAYLOAD)
+        version = await SharedCache(backend).version("weather:sivas")
+        assert backend._maps == {}
+        written_at, _ = await backend.read("weather:sivas")
+        return version, written_at
+
+    version, written_at = asyncio.run(run())
+    assert version == written_at
+
+
+class _FailingBackend(FileCacheBackend):
+    def __init__(self, directory, fail):
+        super().__init__(directory)
+        self.fail = fail
+
+    async def read(self, key):
+        if "read" in self.fail:
+            raise ConnectionError("cache backend down")
+        return await super().read(key)
+
+    async def write(self, key, value):
+        if "write" in self.fail:
+            raise PermissionError("cache dir not writable")
+        await super().write(key, value)
+
+
+def test_backend_errors_fall_back_to_refresh(tmp_path):
+    async def run(fail):
+        cache = SharedCache(_FailingBackend(tmp_path, fail))
+        return await cache.get_or_refresh("weather:sivas", _refresher(str(tmp_path), delay=0), 60)
+
+    assert bytes(asyncio.run(run({"read"}))) == PAYLOAD
+    assert bytes(asyncio.run(run({"write"}))) == PAYLOAD
+    assert _refresh_count(tmp_path) == 2
+    # Yazma başarısız olsa da kilit bırakılır
+    assert asyncio.run(FileCacheBackend(tmp_path).acquire("weather:sivas")) is not None
+
+
+def test_waiters_time_out_instead_of_refreshing_without_lock(tmp_path):
+    async def run():
+        cache = SharedCache(FileCacheBackend(tmp_path), poll_interval=0.01, wait_timeout=0.1)
+        token = await FileCacheBackend(tmp_path).acquire("weather:sivas")
+        assert token is not None
+        # Değer yok ve kilit başka worker'da
+        return await asyncio.gather(
+            *(cache.get_or_refresh("weather:sivas", _refresher(str(tmp_path), delay=0), 60) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert not (tmp_path / "refreshes").exists()
+
+
+def test_default_directory_is_namespaced_by_database(tmp_path, monkeypatch):
+    monkeypatch.setattr("shared_cache._SHM_DIR", tmp_path)
+    first = FileCacheBackend(namespace="weather_prod")
+    second = FileCacheBackend(namespace="weather_staging")
+    assert first.directory != second.directory
+    assert first.directory.parent == tmp_path
+    assert "weather_prod" in first.directory.name
@@ -0,0 +1,162 @@
+import asyncio
+import gzip
+import json
+import multiprocessing
+import time
+
+import httpx
+import pytest
+
+from upstream_recorder import UpstreamRecorder, UpstreamReplayer, RecordingTransport, ReplayTransport, recording_files
+
+URL = "https://api.collectapi.com/weather/getWeather?lang=tr&city=sivas"
+UPSTREAM_LATENCY = 0.2
+
+
+def _upstream():
+    """Her üçüncü istekte zaman aşımı veren, gecikmeli sahte upstream"""
+    calls = {"count": 0}
+
+    async def handler(request):
+        calls["count"] += 1
+        await asyncio.sleep(UPSTREAM_LATENCY)
+        if calls["count"] == 3:
+            raise httpx.ReadTimeout("upstream too slow", request=request)
+        result = [{"degree": "12.5", "humidity": "70"}]
+        return httpx.Response(200, json={"success": True, "result": result, "call": calls["count"]})
+
+    return httpx.MockTransport(handler)
+
+
+async def _record(path, count):
+    recorder = UpstreamRecorder(path)
+    transport = RecordingTransport(recorder, inner=_upstream())
+    results = []
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(count):
+            try:
+                results.append((await client.get(URL)).json())
+            except httpx.ReadTimeout as e:
+                results.append(type(e).__name__)
+    return results
+
+
+async def _replay(path, count, speed):
+    transport = ReplayTransport(UpstreamReplayer(path, speed=speed))
+    results = []
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                results.append((await client.get(URL)).json())
+            except httpx.ReadTimeout as e:
+                results.append(type(e).__name__)
+            results[-1] = (results[-1], time.perf_counter() - start)
+    return results
+
+
+def test_record_replay_round_trip(tmp_path):
+    path = tmp_path / "collectapi.jsonl.gz"
+    speed = 4.0
+    recorded = asyncio.run(_record(path, 4))
+    assert recorded[2] == "ReadTimeout"
+
+    replayer = UpstreamReplayer(path, speed=speed)
+    latencies = replayer.latencies()
+    assert len(latencies) == 4
+    assert all(latency >= UPSTREAM_LATENCY for latency in latencies)
+
+    replayed = asyncio.run(_replay(path, 4, speed))
+    assert [result for result, _ in replayed] == recorded
+    for (_, elapsed), latency in zip(replayed, latencies):
+        assert elapsed >= latency / speed
+        assert elapsed < latency / speed + 0.1
+
+    # Kayıtlar döngüsel olarak tekrar oynatılır
+    again = asyncio.run(_replay(path, 1, 100.0))
+    assert again[0][0] == recorded[0]
+
+
+def test_authorization_header_is_not_recorded(tmp_path):
+    path = tmp_path / "collectapi.jsonl.gz"
+
+    async def run():
+        transport = RecordingTransport(UpstreamRecorder(path), inner=_upstream())
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get(URL, headers={"Authorization": "apikey secret-token"})
+
+    asyncio.run(run())
+    files = recording_files(path)
+    assert files
+    for file in files:
+        with gzip.open(file, "rt", encoding="utf-8") as f:
+            assert "secret-token" not in f.read()
+
+
+def _entry(worker, i):
+    body = json.dumps({"success": True, "result": [{"degree": "12.5", "humidity": "70", "description": "parçalı bulutlu"}] * 20})
+    return {"key": f"GET {URL}", "recorded_at": f"2026-01-01T00:00:{i:02d}.{worker:06d}", "latency": 0.01, "worker": worker, "i": i, "body": body}
+
+
+def _append_many(path, worker, count):
+    recorder = UpstreamRecorder(path)
+    for i in range(count):
+        recorder.append(_entry(worker, i))
+
+
+def test_concurrent_processes_write_own_streams(tmp_path):
+    path = tmp_path / "collectapi.jsonl.gz"
+    processes = [multiprocessing.Process(target=_append_many, args=(path, worker, 50)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+
+    assert len(recording_files(path)) == 4
+    replayer = UpstreamReplayer(path)
+    entries = replayer._entries[f"GET {URL}"]
+    # Worker dosyaları kayıt zamanına göre birleştirilir
+    assert [(e["i"], e["worker"]) for e in entries] == [(i, w) for i in range(50) for w in range(4)]
+
+
+def test_recording_is_readable_before_close_and_compact(tmp_path):
+    path = tmp_path / "collectapi.jsonl.gz"
+    recorder = UpstreamRecorder(path)
+    for i in range(50):
+        recorder.append(_entry(0, i))
+
+    # Kapatılmadan (worker çalışırken) okunabilir
+    assert len(UpstreamReplayer(path).latencies()) == 50
+
+    # Tek akış, kayıt başına ayrı gzip üyesine göre çok daha küçük
+    per_member = sum(len(gzip.compress((json.dumps(_entry(0, i)) + "\n").encode("utf-8"))) for i in range(50))
+    size = sum(file.stat().st_size for file in recording_files(path))
+    assert size * 5 < per_member
+    recorder.close()
+    assert len(UpstreamReplayer(path).latencies()) == 50
+
+
+def test_replay_mode_is_deterministic(tmp_path, monkeypatch):
+    path = tmp_path / "collectapi.jsonl.gz"
+    asyncio.run(_record(path, 4))
+    monkeypatch.setenv("COLLECTAPI_MODE", "replay")
+    monkeypatch.setenv("COLLECTAPI_RECORDING", str(path))
+    monkeypatch.setenv("COLLECTAPI_REPLAY_SPEED", "100")
+    monkeypatch.setenv("COLLECTAPI_REPLAY_SEED", "42")
+
+    from weather_service import WeatherService
+
+    async def run():
+        service = WeatherService()
+        responses = [await service.get_sivas_weather() for _ in range(4)]
+        return [r.model_dump(exclude={"lastUpdate"}) for r in responses]
+
+    assert asyncio.run(run()) == asyncio.run(run())
+
+
+def test_replay_speed_must_be_positive(tmp_path):
+    path = tmp_path / "collectapi.jsonl.gz"
+    asyncio.run(_record(path, 1))
+    with pytest.raises(ValueError):
+        UpstreamReplayer(path, speed=0)